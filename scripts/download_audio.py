@@ -10,19 +10,37 @@ Usage:
     python download_audio.py --metadata download_metadata.csv --output audio/ --piece-ids id1,id2,id3
 
 Requirements:
-    - yt-dlp: pip install yt-dlp
+    - yt-dlp (Python package): pip install yt-dlp
     - ffmpeg: brew install ffmpeg (macOS) or apt install ffmpeg (Linux)
+    - aria2c (optional, for --fast-downloader): brew install aria2 (macOS) or apt install aria2 (Linux)
 """
 
 import argparse
+import asyncio
 import csv
+import hashlib
+import multiprocessing
+import os
+import queue
 import subprocess
 import sys
+import threading
+from contextlib import contextmanager
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import tempfile
 import shutil
 
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError
+    from yt_dlp.version import __version__ as YT_DLP_VERSION
+except ImportError:
+    YoutubeDL = None
+
 class Colors:
     """ANSI color codes for terminal output"""
     HEADER = '\033[95m'
@@ -34,18 +52,83 @@ class Colors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
 
-def check_dependencies():
-    """Check if required tools are installed"""
+# aria2c settings for --fast-downloader: up to 16 persistent connections per file
+ARIA2C_ARGS = ['-x', '16', '-s', '16', '-k', '1M', '--file-allocation=none']
+
+# Status lines from workers go through this queue to a single printer thread, so
+# parallel workers never interleave partial lines
+_output_queue = queue.SimpleQueue()
+_printer_pid = None  # Process whose printer thread is draining _output_queue
+
+# Metadata entry with the download_metadata.csv columns used by this script
+Entry = namedtuple('Entry', ['piece_id', 'youtube_url', 'start_time', 'end_time', 'audio_filename', 'movement'])
+
+# Base yt-dlp options; files are written to the 'paths' home set per download
+YDL_OPTS = {
+    'format': 'bestaudio',  # Download best audio format
+    'outtmpl': 'full_audio.%(ext)s',
+    'noplaylist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'socket_timeout': 30,
+}
+
+# Fade-in/fade-out applied to every segment to prevent audio pops/clicks
+FADE_DURATION = 0.1  # 100ms
+
+# RAM-backed tmpfs for scratch downloads when available (Linux); None falls back to
+# the platform's default temp directory
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Idle YoutubeDL instances, reused across entries so extractor state (such as the
+# parsed YouTube player JS) is not rebuilt for every download
+_downloaders = queue.SimpleQueue()
+
+def configure_colors(enabled):
+    """Blank the ANSI color codes when disabled (e.g. output redirected to a file)"""
+    if not enabled:
+        for name in [name for name in vars(Colors) if name.isupper()]:
+            setattr(Colors, name, '')
+
+def emit(*lines):
+    """Write status lines as one block, through the printer thread when it is running"""
+    text = ''.join(f'{line}\n' for line in lines)
+    if _printer_pid == os.getpid():
+        _output_queue.put(text)
+    else:
+        # No printer thread in this process (e.g. a pool worker process)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+@contextmanager
+def printer_thread():
+    """Run a printer thread that writes queued status lines for the duration of the block"""
+    global _printer_pid
+    
+    def drain():
+        while (text := _output_queue.get()) is not None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    thread = threading.Thread(target=drain, daemon=True)
+    thread.start()
+    _printer_pid = os.getpid()
+    try:
+        yield
+    finally:
+        _printer_pid = None
+        _output_queue.put(None)
+        thread.join()
+
+def check_dependencies(fast_downloader=False):
+    """Check if required tools are installed (and aria2c, if fast_downloader is set)"""
     print(f"{Colors.HEADER}Checking dependencies...{Colors.ENDC}")
     
     # Check yt-dlp
-    try:
-        result = subprocess.run(['yt-dlp', '--version'], 
-                              capture_output=True, text=True, timeout=5)
-        print(f"{Colors.OKGREEN}✓ yt-dlp found: {result.stdout.strip()}{Colors.ENDC}")
-    except (FileNotFoundError, subprocess.TimeoutExpired):
+    if YoutubeDL is None:
         print(f"{Colors.FAIL}✗ yt-dlp not found. Install: pip install yt-dlp{Colors.ENDC}")
         return False
+    print(f"{Colors.OKGREEN}✓ yt-dlp found: {YT_DLP_VERSION}{Colors.ENDC}")
     
     # Check ffmpeg
     try:
@@ -57,136 +140,452 @@ def check_dependencies():
         print(f"{Colors.FAIL}✗ ffmpeg not found. Install: brew install ffmpeg (macOS) or apt install ffmpeg (Linux){Colors.ENDC}")
         return False
     
+    # Check aria2c (optional)
+    if fast_downloader:
+        if shutil.which('aria2c'):
+            print(f"{Colors.OKGREEN}✓ aria2c found{Colors.ENDC}")
+        else:
+            print(f"{Colors.WARNING}⚠️  aria2c not found, using yt-dlp's built-in downloader. "
+                  f"Install: brew install aria2 (macOS) or apt install aria2 (Linux){Colors.ENDC}")
+    
     return True
 
-def download_and_extract(piece_id, youtube_url, start_time, end_time, output_path, audio_filename):
+def read_metadata(metadata_path):
+    """
+    Read metadata entries from the download CSV
+    
+    The header is parsed once and each row is stored as a tuple picked by column
+    index, rather than as a dict per row.
+    
+    Returns:
+        list: Entry tuples, one per non-empty row
+    
+    Raises:
+        ValueError: If a required column is missing from the header
+    """
+    with open(metadata_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [name for name in Entry._fields if name not in header]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        
+        pick = itemgetter(*(header.index(name) for name in Entry._fields))
+        return [Entry._make(pick(row)) for row in reader if row]
+
+async def run_command(cmd, timeout):
+    """
+    Run an external command without blocking the event loop
+    
+    Returns:
+        subprocess.CompletedProcess with decoded stdout/stderr
+    
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish within timeout seconds
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode,
+        stdout.decode('utf-8', errors='replace'),
+        stderr.decode('utf-8', errors='replace')
+    )
+
+@contextmanager
+def checkout_downloader(ydl_opts):
+    """
+    Borrow an idle YoutubeDL instance, creating one if none is available
+    
+    YoutubeDL is not thread-safe, so each instance is used by one caller at a time
+    and returned to the pool afterwards.
+    """
+    try:
+        ydl = _downloaders.get_nowait()
+    except queue.Empty:
+        ydl = YoutubeDL(ydl_opts)
+    try:
+        yield ydl
+    finally:
+        _downloaders.put(ydl)
+
+def resolve_stream_url(youtube_url, ydl_opts):
+    """
+    Resolve the direct media URL of the best audio stream (blocking)
+    
+    Returns:
+        tuple or None: (url, http_headers) where http_headers are the headers yt-dlp
+        would send for the request, or None if the URL cannot be resolved or points
+        to an HLS/DASH manifest (which ffmpeg cannot fetch as a seekable byte range)
+    """
+    try:
+        with checkout_downloader(ydl_opts) as ydl:
+            info = ydl.extract_info(youtube_url, download=False)
+    except DownloadError:
+        return None
+    
+    # 'http'/'https' are plain files; 'm3u8_native', 'http_dash_segments' etc. are manifests
+    if info.get('protocol') not in ('http', 'https') or not info.get('url'):
+        return None
+    
+    return info['url'], info.get('http_headers') or {}
+
+def download_full_audio(youtube_url, dest_dir, ydl_opts):
+    """Download the best audio stream of a video into dest_dir (blocking)"""
+    with checkout_downloader(ydl_opts) as ydl:
+        ydl.params['paths'] = {'home': str(dest_dir)}
+        ydl.download([youtube_url])
+
+def fade_filter(start, end):
+    """ffmpeg filter fading in at start and out just before end (in seconds)"""
+    return (f'afade=t=in:st={start}:d={FADE_DURATION},'
+            f'afade=t=out:st={round(end - FADE_DURATION, 3)}:d={FADE_DURATION}')
+
+def warm_up_downloader(youtube_url, ydl_opts):
     """
-    Download YouTube video and extract audio segment
+    Extract one video's info so the YouTube player JS is fetched and written to the
+    yt-dlp cache once, instead of by every parallel worker starting cold
+    
+    Uses a throwaway instance that is closed afterwards: only the on-disk cache is
+    meant to be shared, not the instance or its open connections.
+    """
+    try:
+        with YoutubeDL(ydl_opts) as ydl:
+            ydl.extract_info(youtube_url, download=False)
+    except DownloadError:
+        pass  # The worker for this video reports the error
+
+async def extract_segment(source, start_time, end_time, output_file, timeout=60, headers=None):
+    """
+    Extract a segment from a local file or direct media URL with ffmpeg
+    
+    -ss before -i seeks in the container (an HTTP Range request for URLs), so the
+    fade times are relative to the start of the segment. For URLs, headers (e.g. the
+    User-Agent and cookies yt-dlp resolved the URL with) are sent with the request.
+    
+    Returns:
+        subprocess.CompletedProcess
+    """
+    duration = float(end_time) - float(start_time)
+    input_args = []
+    if headers:
+        input_args = ['-headers', ''.join(f'{key}: {value}\r\n' for key, value in headers.items())]
+    extract_cmd = [
+        'ffmpeg',
+        '-nostdin',  # Never poll the terminal for interactive commands
+        '-ss', str(start_time),
+        *input_args,
+        '-i', str(source),
+        '-t', str(duration),
+        '-af', fade_filter(0, duration),
+        '-ar', '48000',  # 48kHz sample rate
+        '-ac', '2',      # Stereo
+        '-y',
+        '-loglevel', 'error',
+        str(output_file)
+    ]
+    
+    return await run_command(extract_cmd, timeout=timeout)
+
+async def extract_segments(source, rows, output_path):
+    """
+    Extract the segments of several metadata entries from one local file with a
+    single ffmpeg process
+    
+    One filter graph decodes the source once, splits it and trims/fades a labelled
+    branch per segment, so the graph is set up once rather than once per output.
+    Only the span from the first segment start to the last segment end is decoded:
+    the input is seeked in the container and trim times are relative to that seek.
+    
+    Returns:
+        subprocess.CompletedProcess
+    """
+    span_start = min(float(row.start_time) for row in rows)
+    span_end = max(float(row.end_time) for row in rows)
+    
+    branches = [f'[0:a]asplit={len(rows)}' + ''.join(f'[s{i}]' for i in range(len(rows)))]
+    outputs = []
+    for i, row in enumerate(rows):
+        start_time, end_time = float(row.start_time), float(row.end_time)
+        trim_start, trim_end = round(start_time - span_start, 3), round(end_time - span_start, 3)
+        branches.append(
+            f'[s{i}]atrim={trim_start}:{trim_end},asetpts=PTS-STARTPTS,'
+            f'{fade_filter(0, end_time - start_time)}[a{i}]'
+        )
+        outputs += [
+            '-map', f'[a{i}]',
+            '-ar', '48000',  # 48kHz sample rate
+            '-ac', '2',      # Stereo
+            str(output_path / row.audio_filename)
+        ]
+    
+    extract_cmd = [
+        'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+        '-ss', str(span_start),
+        '-t', str(round(span_end - span_start, 3)),
+        '-i', str(source),
+        '-filter_complex', ';'.join(branches),
+    ] + outputs
+    
+    return await run_command(extract_cmd, timeout=60 + 10 * len(rows))
+
+def list_existing_files(output_path):
+    """Names of all files in output_path, collected with a single directory scan"""
+    with os.scandir(output_path) as entries:
+        return {entry.name for entry in entries}
+
+def verify_output(output_file):
+    """
+    Verify output file exists and has reasonable size
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    if not output_file.exists():
+        return (False, f"{Colors.FAIL}Output file not created{Colors.ENDC}")
+    
+    file_size = output_file.stat().st_size / (1024 * 1024)  # MB
+    if file_size < 0.1:
+        output_file.unlink()  # Remove too-small file
+        return (False, f"{Colors.FAIL}Output file too small ({file_size:.2f} MB){Colors.ENDC}")
+    
+    return (True, f"{Colors.OKGREEN}Success ({file_size:.1f} MB){Colors.ENDC}")
+
+def cache_entry_dir(cache_dir, youtube_url):
+    """Cache subdirectory holding the full audio of one video"""
+    return cache_dir / hashlib.sha1(youtube_url.encode('utf-8')).hexdigest()[:16]
+
+def find_cached_audio(entry_dir):
+    """
+    Find the fully downloaded audio file (webm, m4a, etc.) in a cache subdirectory
+    
+    yt-dlp and aria2c only rename a download to full_audio.<ext> once it is complete,
+    so any name with a further suffix (.part, .part-Frag3, .ytdl, .part.aria2, ...)
+    is a leftover of an interrupted download.
+    
+    Returns:
+        Path or None: Cached audio file, ignoring partial download files
+    """
+    try:
+        with os.scandir(entry_dir) as entries:
+            return next((
+                Path(entry.path) for entry in entries
+                if entry.name.startswith('full_audio.') and entry.name.count('.') == 1
+            ), None)
+    except FileNotFoundError:
+        return None
+
+async def fetch_source(youtube_url, cache_dir, ydl_opts):
+    """
+    Return the cached full audio of a video, downloading it first if needed
+    
+    Returns:
+        Path or None: Cached audio file, or None if the download produced no file
+    
+    Raises:
+        DownloadError: If yt-dlp fails to download the video
+    """
+    entry_dir = cache_entry_dir(cache_dir, youtube_url)
+    full_audio_path = find_cached_audio(entry_dir)
+    if full_audio_path is None:
+        await asyncio.to_thread(download_full_audio, youtube_url, entry_dir, ydl_opts)
+        full_audio_path = find_cached_audio(entry_dir)
+    return full_audio_path
+
+async def cut_segment(source, row, output_path, timeout=60, headers=None):
+    """
+    Extract the segment of one metadata entry from source and verify the result
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    output_file = output_path / row.audio_filename
+    try:
+        result = await extract_segment(source, row.start_time, row.end_time, output_file,
+                                       timeout=timeout, headers=headers)
+    except subprocess.TimeoutExpired:
+        output_file.unlink(missing_ok=True)  # Remove partial output
+        return (False, f"{Colors.FAIL}Timeout{Colors.ENDC}")
+    
+    if result.returncode != 0:
+        output_file.unlink(missing_ok=True)  # Remove partial output
+        return (False, f"{Colors.FAIL}Extraction failed: {result.stderr[:100]}{Colors.ENDC}")
+    
+    return verify_output(output_file)
+
+async def download_and_extract(youtube_url, rows, output_path, cache_dir, keep_cache, ydl_opts):
+    """
+    Download a YouTube video once and extract the audio segments of all its entries
     
     Args:
-        piece_id: Unique piece identifier
-        youtube_url: YouTube video URL
-        start_time: Start timestamp in seconds
-        end_time: End timestamp in seconds
+        youtube_url: YouTube video URL shared by all rows
+        rows: Metadata entries to extract from this video
         output_path: Output directory path
-        audio_filename: Target audio filename
+        cache_dir: Directory for cached full audio downloads
+        keep_cache: Keep the downloaded full audio after its segments are cut
+        ydl_opts: yt-dlp options for the shared YoutubeDL instances
     
     Returns:
-        tuple: (success: bool, message: str)
+        list: (success: bool, message: str) tuple per row, in the same order
     """
+    outcomes = {}
+    pending = list(rows)
+    
     try:
-        output_file = output_path / audio_filename
+        # Step 1: A lone segment of an uncached video streams only the required range
+        # straight from the media URL (unless the source is to be kept in the cache)
+        if (not keep_cache and len(pending) == 1
+                and find_cached_audio(cache_entry_dir(cache_dir, youtube_url)) is None):
+            stream = await asyncio.to_thread(resolve_stream_url, youtube_url, ydl_opts)
+            if stream:
+                stream_url, headers = stream
+                success, message = await cut_segment(stream_url, pending[0], output_path,
+                                                      timeout=300, headers=headers)
+                if success:
+                    outcomes[pending[0].piece_id] = (success, message)
+                    pending = []
         
-        # Skip if already exists
-        if output_file.exists():
-            return (True, f"{Colors.WARNING}Already exists{Colors.ENDC}")
-        
-        # Create temporary directory for this download
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Step 1: Download best audio using yt-dlp
-            download_cmd = [
-                'yt-dlp',
-                '-f', 'bestaudio',  # Download best audio format
-                '--output', str(temp_path / 'full_audio.%(ext)s'),
-                '--no-playlist',
-                '--quiet',
-                '--no-warnings',
-                youtube_url
-            ]
-            
-            result = subprocess.run(download_cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode != 0:
-                return (False, f"{Colors.FAIL}Download failed: {result.stderr[:100]}{Colors.ENDC}")
-            
-            # Find the downloaded audio file (webm, m4a, etc.)
-            audio_files = list(temp_path.glob('full_audio.*'))
-            
-            if not audio_files:
-                return (False, f"{Colors.FAIL}No audio file found after download{Colors.ENDC}")
-            
-            full_audio_path = audio_files[0]
-            
-            # Step 2: Extract segment using ffmpeg
-            duration = float(end_time) - float(start_time)
+        # Step 2: Download the full audio once into the cache (HLS/DASH sources,
+        # failed streams and videos with several segments)
+        if pending:
+            entry_dir = cache_entry_dir(cache_dir, youtube_url)
+            downloads_source = find_cached_audio(entry_dir) is None
+            try:
+                try:
+                    full_audio_path = await fetch_source(youtube_url, cache_dir, ydl_opts)
+                except DownloadError as e:
+                    full_audio_path = None
+                    failure = (False, f"{Colors.FAIL}Download failed: {str(e)[:100]}{Colors.ENDC}")
+                else:
+                    failure = (False, f"{Colors.FAIL}No audio file found after download{Colors.ENDC}")
+                
+                # Step 3: Cut every remaining segment from the cached file in one ffmpeg
+                # pass; if that fails, cut them one by one so a single bad entry does not
+                # fail the whole video
+                batch_ok = False
+                if full_audio_path is not None and len(pending) > 1:
+                    try:
+                        result = await extract_segments(full_audio_path, pending, output_path)
+                        batch_ok = result.returncode == 0
+                    except subprocess.TimeoutExpired:
+                        pass
+                
+                for row in pending:
+                    if full_audio_path is None:
+                        outcomes[row.piece_id] = failure
+                    elif batch_ok:
+                        outcomes[row.piece_id] = verify_output(output_path / row.audio_filename)
+                    else:
+                        outcomes[row.piece_id] = await cut_segment(full_audio_path, row, output_path)
             
-            # First extract the segment without fade
-            temp_output = temp_path / 'temp_nofade.wav'
-            extract_cmd = [
-                'ffmpeg',
-                '-i', str(full_audio_path),
-                '-ss', str(start_time),
-                '-t', str(duration),
-                '-ar', '48000',  # 48kHz sample rate
-                '-ac', '2',      # Stereo
-                '-y',
-                '-loglevel', 'error',
-                str(temp_output)
-            ]
-            
-            result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                return (False, f"{Colors.FAIL}Extraction failed: {result.stderr[:100]}{Colors.ENDC}")
-            
-            # Step 3: Apply 100ms fade-in and fade-out to prevent audio pops/clicks
-            fade_duration = 0.1  # 100ms
-            fade_cmd = [
-                'ffmpeg',
-                '-i', str(temp_output),
-                '-af', f'afade=t=in:st=0:d={fade_duration},afade=t=out:st={duration-fade_duration}:d={fade_duration}',
-                '-y',
-                '-loglevel', 'error',
-                str(output_file)
-            ]
-            
-            result = subprocess.run(fade_cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                return (False, f"{Colors.FAIL}Extraction failed: {result.stderr[:100]}{Colors.ENDC}")
-            
-            # Verify output file exists and has reasonable size
-            if not output_file.exists():
-                return (False, f"{Colors.FAIL}Output file not created{Colors.ENDC}")
-            
-            file_size = output_file.stat().st_size / (1024 * 1024)  # MB
-            if file_size < 0.1:
-                output_file.unlink()  # Remove too-small file
-                return (False, f"{Colors.FAIL}Output file too small ({file_size:.2f} MB){Colors.ENDC}")
-            
-            return (True, f"{Colors.OKGREEN}Success ({file_size:.1f} MB){Colors.ENDC}")
+            finally:
+                # Evict a source downloaded by this call right away, so the cache
+                # (possibly in RAM) holds at most one file per in-flight video; entries
+                # that were already cached before are left alone
+                if downloads_source and not keep_cache:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
     
-    except subprocess.TimeoutExpired:
-        return (False, f"{Colors.FAIL}Timeout{Colors.ENDC}")
     except Exception as e:
-        return (False, f"{Colors.FAIL}Error: {str(e)[:100]}{Colors.ENDC}")
-
-def process_entry(row, output_path, index, total):
-    """Process a single metadata entry"""
-    piece_id = row['piece_id']
-    youtube_url = row['youtube_url']
-    start_time = row['start_time']
-    end_time = row['end_time']
-    audio_filename = row['audio_filename']
-    movement = row['movement']
-    
-    print(f"[{index}/{total}] Processing: {piece_id} - {movement[:50]}...")
-    
-    success, message = download_and_extract(
-        piece_id, youtube_url, start_time, end_time, 
-        output_path, audio_filename
+        for row in pending:
+            outcomes.setdefault(row.piece_id, (False, f"{Colors.FAIL}Error: {str(e)[:100]}{Colors.ENDC}"))
+    
+    return [outcomes[row.piece_id] for row in rows]
+
+async def process_group(youtube_url, indexed_rows, output_path, cache_dir, keep_cache, total, ydl_opts):
+    """Process all metadata entries sharing one YouTube URL"""
+    emit(*(
+        f"[{index}/{total}] Processing: {row.piece_id} - {row.movement[:50]}..."
+        for index, row in indexed_rows
+    ))
+    
+    outcomes = await download_and_extract(
+        youtube_url, [row for _, row in indexed_rows],
+        output_path, cache_dir, keep_cache, ydl_opts
     )
     
-    status = "✓" if success else "✗"
-    print(f"  {status} {message}")
+    results = []
+    lines = []
+    for (_, row), (success, message) in zip(indexed_rows, outcomes):
+        status = "✓" if success else "✗"
+        lines.append(f"  {status} {row.piece_id}: {message}")
+        
+        results.append({
+            'piece_id': row.piece_id,
+            'success': success,
+            'message': message,
+            'movement': row.movement
+        })
+    
+    emit(*lines)
+    return results
+
+async def process_groups(groups, output_path, cache_dir, keep_cache, workers, ydl_opts):
+    """
+    Process groups of metadata entries concurrently
+    
+    A single event loop supervises all yt-dlp/ffmpeg subprocesses; the semaphore
+    caps how many videos are in flight at once.
+    
+    Args:
+        groups: List of (youtube_url, [(index, row), ...]) tuples
+    
+    Returns:
+        list: Result dicts for all entries, in group order
+    """
+    semaphore = asyncio.Semaphore(workers)
+    total = sum(len(indexed_rows) for _, indexed_rows in groups)
+    
+    # Blocking yt-dlp calls run via asyncio.to_thread; size the default executor to
+    # match the semaphore instead of asyncio's min(32, cpu_count + 4) threads
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+    
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+    
+    tasks = [
+        bounded(process_group(youtube_url, indexed_rows, output_path, cache_dir, keep_cache, total, ydl_opts))
+        for youtube_url, indexed_rows in groups
+    ]
+    return [result for group_results in await asyncio.gather(*tasks) for result in group_results]
+
+def run_group(youtube_url, indexed_rows, output_path, cache_dir, keep_cache, total, ydl_opts):
+    """Process one group on its own event loop (entry point for pool workers)"""
+    return asyncio.run(process_group(
+        youtube_url, indexed_rows, output_path, cache_dir, keep_cache, total, ydl_opts
+    ))
+
+def process_groups_in_pool(groups, output_path, cache_dir, keep_cache, ydl_opts, executor):
+    """
+    Process groups of metadata entries with a thread or process pool
+    
+    Task arguments are plain picklable values so groups can be sent to worker
+    processes. The executor is shut down on return.
+    
+    Returns:
+        list: Result dicts for all entries, in completion order
+    """
+    total = sum(len(indexed_rows) for _, indexed_rows in groups)
+    results = []
+    with executor:
+        futures = [
+            executor.submit(run_group, youtube_url, indexed_rows, output_path, cache_dir,
+                            keep_cache, total, ydl_opts)
+            for youtube_url, indexed_rows in groups
+        ]
+        
+        for future in as_completed(futures):
+            results.extend(future.result())
     
-    return {
-        'piece_id': piece_id,
-        'success': success,
-        'message': message,
-        'movement': movement
-    }
+    return results
 
 def main():
     parser = argparse.ArgumentParser(
@@ -200,11 +599,17 @@ Examples:
   # Download with 4 parallel workers (faster)
   python download_audio.py --metadata download_metadata.csv --output audio/ --workers 4
   
+  # Run workers as separate processes
+  python download_audio.py --metadata download_metadata.csv --output audio/ --workers 8 --executor process
+  
   # Download specific pieces only
   python download_audio.py --metadata download_metadata.csv --output audio/ --piece-ids id1,id2,id3
   
   # Continue interrupted download (skips existing files)
   python download_audio.py --metadata download_metadata.csv --output audio/
+  
+  # Keep downloaded source audio so later runs can re-cut without downloading
+  python download_audio.py --metadata download_metadata.csv --output audio/ --keep-cache
         """
     )
     
@@ -214,18 +619,36 @@ Examples:
                        help='Output directory for audio files')
     parser.add_argument('--workers', type=int, default=1,
                        help='Number of parallel download workers (default: 1)')
+    parser.add_argument('--executor', choices=['async', 'thread', 'process'], default='async',
+                       help='How parallel workers run: one asyncio event loop (default), '
+                            'a thread pool, or a process pool (e.g. with --workers set to the CPU count)')
     parser.add_argument('--piece-ids', type=str,
                        help='Comma-separated list of piece IDs to download (optional)')
+    parser.add_argument('--fragments', type=int, default=4,
+                       help='Fragments downloaded concurrently for HLS/DASH sources (default: 4)')
+    parser.add_argument('--cache-dir', type=str,
+                       help='Directory for downloaded full audio (default: <output>/.cache with '
+                            '--keep-cache, otherwise a temporary directory in /dev/shm if available)')
+    parser.add_argument('--keep-cache', action='store_true',
+                       help='Keep downloaded full audio after the run instead of deleting it')
+    parser.add_argument('--fast-downloader', action='store_true',
+                       help='Download through aria2c with persistent parallel connections, if installed')
+    parser.add_argument('--ytdl-cache-dir', type=str,
+                       help='yt-dlp cache directory shared by all workers (default: ~/.cache/yt-dlp)')
     
     args = parser.parse_args()
     
+    # No ANSI escapes when output is redirected to a file or pipe
+    use_colors = sys.stdout.isatty()
+    configure_colors(use_colors)
+    
     # Print header
     print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}")
     print(f"{Colors.HEADER}{Colors.BOLD}Classicap Dataset Audio Downloader{Colors.ENDC}")
     print(f"{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}\n")
     
     # Check dependencies
-    if not check_dependencies():
+    if not check_dependencies(args.fast_downloader):
         print(f"\n{Colors.FAIL}Please install missing dependencies and try again.{Colors.ENDC}")
         sys.exit(1)
     
@@ -236,45 +659,85 @@ Examples:
     output_path.mkdir(parents=True, exist_ok=True)
     print(f"Output directory: {output_path.absolute()}\n")
     
+    # Downloads that are not kept go to a scratch directory on tmpfs when possible,
+    # so full audio files never hit the disk
+    scratch_dir = None
+    if args.cache_dir:
+        cache_dir = Path(args.cache_dir)
+    elif args.keep_cache:
+        cache_dir = output_path / '.cache'
+    else:
+        scratch_dir = tempfile.TemporaryDirectory(prefix='classicap-', dir=SHM_DIR)
+        cache_dir = Path(scratch_dir.name)
+    
     # Read metadata
     metadata_path = Path(args.metadata)
     if not metadata_path.exists():
         print(f"{Colors.FAIL}Error: Metadata file not found: {metadata_path}{Colors.ENDC}")
         sys.exit(1)
     
-    with open(metadata_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    try:
+        rows = read_metadata(metadata_path)
+    except ValueError as e:
+        print(f"{Colors.FAIL}Error: Invalid metadata file {metadata_path}: {e}{Colors.ENDC}")
+        sys.exit(1)
     
     # Filter by piece IDs if specified
     if args.piece_ids:
         piece_id_list = [pid.strip() for pid in args.piece_ids.split(',')]
-        rows = [row for row in rows if row['piece_id'] in piece_id_list]
+        rows = [row for row in rows if row.piece_id in piece_id_list]
         print(f"Filtered to {len(rows)} pieces based on --piece-ids\n")
     
-    print(f"Total entries to process: {len(rows)}\n")
+    # Skip existing files up front so only missing entries are scheduled
+    existing = list_existing_files(output_path)
+    pending_rows = [row for row in rows if row.audio_filename not in existing]
+    if len(pending_rows) < len(rows):
+        print(f"{Colors.WARNING}Skipping {len(rows) - len(pending_rows)} entries that are already downloaded{Colors.ENDC}\n")
+    
+    # Group entries sharing a video so each source is downloaded only once
+    pending_rows.sort(key=lambda row: row.youtube_url)
+    groups = [
+        (youtube_url, list(indexed_rows))
+        for youtube_url, indexed_rows in groupby(enumerate(pending_rows, 1),
+                                                 key=lambda item: item[1].youtube_url)
+    ]
+    
+    print(f"Total entries to process: {len(pending_rows)} (from {len(groups)} videos)\n")
     print(f"{Colors.BOLD}{'='*80}{Colors.ENDC}\n")
     
     # Process entries
-    results = []
-    
-    if args.workers == 1:
-        # Sequential processing
-        for i, row in enumerate(rows, 1):
-            result = process_entry(row, output_path, i, len(rows))
-            results.append(result)
-    else:
-        # Parallel processing
+    ydl_opts = dict(YDL_OPTS, concurrent_fragment_downloads=args.fragments)
+    if args.ytdl_cache_dir:
+        ydl_opts['cachedir'] = args.ytdl_cache_dir
+    if args.fast_downloader and shutil.which('aria2c'):
+        ydl_opts['external_downloader'] = {'default': 'aria2c'}
+        ydl_opts['external_downloader_args'] = {'aria2c': ARIA2C_ARGS}
+    if args.workers > 1:
         print(f"Using {args.workers} parallel workers\n")
-        with ThreadPoolExecutor(max_workers=args.workers) as executor:
-            futures = {
-                executor.submit(process_entry, row, output_path, i, len(rows)): row
-                for i, row in enumerate(rows, 1)
-            }
-            
-            for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
+        if groups:
+            print("Warming up yt-dlp player cache...\n")
+            warm_up_downloader(groups[0][0], ydl_opts)
+    
+    # Worker processes are spawned rather than forked, so they never inherit the
+    # printer thread or other process state; the initializer applies the color choice
+    executor = None
+    if args.executor == 'thread':
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+    elif args.executor == 'process':
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=configure_colors, initargs=(use_colors,)
+        )
+    
+    with printer_thread():
+        if executor is None:
+            results = asyncio.run(process_groups(
+                groups, output_path, cache_dir, args.keep_cache, args.workers, ydl_opts
+            ))
+        else:
+            results = process_groups_in_pool(
+                groups, output_path, cache_dir, args.keep_cache, ydl_opts, executor
+            )
     
     # Summary
     print(f"\n{Colors.BOLD}{'='*80}{Colors.ENDC}")
@@ -300,23 +763,30 @@ Examples:
         print(f"{Colors.BOLD}Integrity Check{Colors.ENDC}")
         print(f"{Colors.BOLD}{'='*80}{Colors.ENDC}\n")
         
+        existing = list_existing_files(output_path)
+        rows_by_id = {row.piece_id: row for row in rows}
         missing_files = []
-        for row in rows:
-            audio_file = output_path / row['audio_filename']
-            if not audio_file.exists():
-                missing_files.append(row['piece_id'])
+        for row in rows_by_id.values():
+            if row.audio_filename not in existing:
+                missing_files.append(row.piece_id)
         
         if missing_files:
             print(f"{Colors.WARNING}⚠️  Found {len(missing_files)} missing files!{Colors.ENDC}")
             print(f"\nAttempting to download missing files...\n")
             
-            # Retry missing files
+            # Retry missing files, grouped by video so each source is fetched once
+            retry_rows = sorted((rows_by_id[piece_id] for piece_id in missing_files),
+                                key=lambda row: row.youtube_url)
             retry_results = []
-            for i, piece_id in enumerate(missing_files, 1):
-                row = next(r for r in rows if r['piece_id'] == piece_id)
-                print(f"[{i}/{len(missing_files)}] Retrying: {piece_id}...")
-                result = process_entry(row, output_path, i, len(missing_files))
-                retry_results.append(result)
+            for youtube_url, indexed_rows in groupby(enumerate(retry_rows, 1),
+                                                     key=lambda item: item[1].youtube_url):
+                indexed_rows = list(indexed_rows)
+                piece_ids = ', '.join(row.piece_id for _, row in indexed_rows)
+                print(f"[{indexed_rows[0][0]}/{len(missing_files)}] Retrying: {piece_ids}...")
+                retry_results.extend(asyncio.run(process_group(
+                    youtube_url, indexed_rows, output_path, cache_dir, args.keep_cache,
+                    len(missing_files), ydl_opts
+                )))
             
             retry_success = sum(1 for r in retry_results if r['success'])
             print(f"\nRetry results: {Colors.OKGREEN}{retry_success}/{len(missing_files)} successful{Colors.ENDC}")
@@ -332,6 +802,11 @@ Examples:
         else:
             print(f"{Colors.OKGREEN}✓ All {len(rows)} files verified present!{Colors.ENDC}")
     
+    # Sources downloaded by this run are evicted as each video finishes, so only the
+    # scratch directory (if one was created) is left to remove
+    if scratch_dir is not None:
+        scratch_dir.cleanup()
+    
     print(f"\n{Colors.OKGREEN}Download complete! Audio files saved to: {output_path.absolute()}{Colors.ENDC}\n")
 
 if __name__ == '__main__':